@@ -3,7 +3,8 @@
 XMind Tool - 零依赖 XMind 文件解析、创建和更新工具。
 
 支持 XMind 8（XML 格式）和 XMind Zen/2020+（JSON 格式）。
-仅使用 Python 标准库，无需安装第三方依赖。
+仅使用 Python 标准库，无需安装第三方依赖；若环境中已安装 lxml / orjson，
+则自动使用其 C 实现的解析器以加速大文件处理。
 
 用法:
   python xmind_tool.py --session <id> parse   <file.xmind>                              解析为 Markdown
@@ -16,6 +17,7 @@ XMind Tool - 零依赖 XMind 文件解析、创建和更新工具。
 """
 
 import io
+import itertools
 import json
 import os
 import re
@@ -24,19 +26,51 @@ import tempfile
 import time
 import uuid
 import zipfile
-import xml.etree.ElementTree as ET
 from pathlib import Path
+from xml.sax.saxutils import escape as _xml_escape
+
+try:
+    from lxml import etree as ET
+    _HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    _HAS_LXML = False
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj):
+        """序列化为 UTF-8 编码的 bytes（缩进 2，保留非 ASCII 字符）。"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj):
+        """序列化为 UTF-8 编码的 bytes（缩进 2，保留非 ASCII 字符）。"""
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
 
 
 # ============================================================
 # 数据模型
 # ============================================================
 
+# 节点 ID 只需在单个文件内唯一：随机前缀 + 自增计数，共 26 位十六进制
+_ID_PREFIX = uuid.uuid4().hex[:16]
+_id_counter = itertools.count()
+
+
+def _new_id():
+    return _ID_PREFIX + format(next(_id_counter), '010x')
+
+
 class Topic:
     """思维导图节点"""
 
+    __slots__ = ('id', 'title', 'children', 'notes', 'labels', 'link', 'markers')
+
     def __init__(self, title="", topic_id=None):
-        self.id = topic_id or uuid.uuid4().hex[:26]
+        self.id = topic_id or _new_id()
         self.title = title
         self.children = []   # list[Topic]
         self.notes = ""      # 纯文本备注
@@ -48,8 +82,10 @@ class Topic:
 class Sheet:
     """工作表（一个 xmind 文件可含多个工作表）"""
 
+    __slots__ = ('id', 'title', 'root_topic')
+
     def __init__(self, title="Sheet 1", sheet_id=None):
-        self.id = sheet_id or uuid.uuid4().hex[:26]
+        self.id = sheet_id or _new_id()
         self.title = title
         self.root_topic = None  # Topic
 
@@ -61,16 +97,38 @@ class Sheet:
 def detect_format(xmind_path):
     """检测 xmind 文件格式：zen (JSON) 或 legacy (XML)。"""
     with zipfile.ZipFile(xmind_path, 'r') as zf:
-        names = zf.namelist()
-        if 'content.json' in names:
-            return 'zen'
-        elif 'content.xml' in names:
-            return 'legacy'
-        else:
-            raise ValueError(
-                f"无法识别的 XMind 格式：文件中既无 content.json 也无 content.xml\n"
-                f"文件内容: {names}"
-            )
+        return _detect_zip_format(zf)
+
+
+def _detect_zip_format(zf):
+    """在已打开的 ZipFile 上检测格式，直接查询已解析的中央目录。"""
+    try:
+        zf.getinfo('content.json')
+        return 'zen'
+    except KeyError:
+        pass
+    try:
+        zf.getinfo('content.xml')
+        return 'legacy'
+    except KeyError:
+        raise ValueError(
+            f"无法识别的 XMind 格式：文件中既无 content.json 也无 content.xml\n"
+            f"文件内容: {zf.namelist()}"
+        ) from None
+
+
+def parse_any(xmind_path):
+    """只打开一次 ZIP，完成格式检测与解析，返回 (format, sheets)。"""
+    with zipfile.ZipFile(xmind_path, 'r') as zf:
+        return parse_any_open(zf)
+
+
+def parse_any_open(zf):
+    """在调用方已打开的 ZipFile 上检测格式并解析，返回 (format, sheets)。"""
+    fmt = _detect_zip_format(zf)
+    if fmt == 'zen':
+        return fmt, _parse_zen_from_zip(zf)
+    return fmt, _parse_legacy_from_zip(zf)
 
 
 # ============================================================
@@ -80,8 +138,11 @@ def detect_format(xmind_path):
 def parse_zen(xmind_path):
     """解析 XMind Zen 格式（JSON）。"""
     with zipfile.ZipFile(xmind_path, 'r') as zf:
-        raw = zf.read('content.json')
-        content = json.loads(raw)
+        return _parse_zen_from_zip(zf)
+
+
+def _parse_zen_from_zip(zf):
+    content = _json_loads(zf.read('content.json'))
 
     sheets = []
     for sheet_data in content:
@@ -110,9 +171,14 @@ def _parse_zen_topic(data):
             ops = notes_data['ops']
             if isinstance(ops, dict):
                 ops = ops.get('ops', [])
-            topic.notes = ''.join(
-                op.get('insert', '') for op in ops if isinstance(op, dict)
-            ).strip()
+            try:
+                # 常见情况：ops 均为 dict，无需逐个做类型检查
+                notes = ''.join(op['insert'] for op in ops if 'insert' in op)
+            except (TypeError, KeyError):
+                notes = ''.join(
+                    op.get('insert', '') for op in ops if isinstance(op, dict)
+                )
+            topic.notes = notes.strip()
 
     # --- 标签 ---
     topic.labels = list(data.get('labels', []))
@@ -129,8 +195,7 @@ def _parse_zen_topic(data):
 
     # --- 子节点 ---
     children_data = data.get('children', {})
-    for child in children_data.get('attached', []):
-        topic.children.append(_parse_zen_topic(child))
+    topic.children = [_parse_zen_topic(c) for c in children_data.get('attached', ())]
 
     return topic
 
@@ -139,73 +204,145 @@ def _parse_zen_topic(data):
 # Legacy 格式解析 (XMind 8)
 # ============================================================
 
-_NS = {'c': 'urn:xmind:xmap:xmlns:content:2.0'}
-_XLINK = '{http://www.w3.org/1999/xlink}href'
+_CONTENT_NS = 'urn:xmind:xmap:xmlns:content:2.0'
+_XLINK_NS = 'http://www.w3.org/1999/xlink'
+
+
+def _ctag(local):
+    """为 Legacy XML 元素添加内容命名空间前缀。"""
+    return f'{{{_CONTENT_NS}}}{local}'
+
+
+# 解析时按标签分派所用的完整限定名，仅在模块加载时生成一次
+_TAG_SHEET = _ctag('sheet')
+_TAG_TOPIC = _ctag('topic')
+_TAG_TOPICS = _ctag('topics')
+_TAG_CHILDREN = _ctag('children')
+_TAG_TITLE = _ctag('title')
+_TAG_NOTES = _ctag('notes')
+_TAG_PLAIN = _ctag('plain')
+_TAG_LABELS = _ctag('labels')
+_TAG_LABEL = _ctag('label')
+_TAG_MARKER_REFS = _ctag('marker-refs')
+_TAG_MARKER_REF = _ctag('marker-ref')
+_XLINK_HREF = f'{{{_XLINK_NS}}}href'
+
+
+def _iterparse(source):
+    """流式解析 XML；lxml 下放开大文件限制。"""
+    events = ('start', 'end')
+    if _HAS_LXML:
+        return ET.iterparse(source, events=events, huge_tree=True)
+    return ET.iterparse(source, events=events)
 
 
 def parse_legacy(xmind_path):
     """解析 XMind 8 格式（XML）。"""
     with zipfile.ZipFile(xmind_path, 'r') as zf:
-        raw = zf.read('content.xml')
+        return _parse_legacy_from_zip(zf)
 
-    root = ET.fromstring(raw)
-    sheets = []
 
-    for sheet_elem in root.findall('c:sheet', _NS):
-        title_elem = sheet_elem.find('c:title', _NS)
-        sheet = Sheet(
-            title=title_elem.text if title_elem is not None and title_elem.text else 'Sheet 1',
-            sheet_id=sheet_elem.get('id'),
-        )
-        topic_elem = sheet_elem.find('c:topic', _NS)
-        if topic_elem is not None:
-            sheet.root_topic = _parse_legacy_topic(topic_elem)
-        sheets.append(sheet)
+def _parse_legacy_from_zip(zf):
+    # 边解压边解析，不在内存中保留完整的 content.xml
+    with zf.open('content.xml') as fp:
+        return _parse_legacy_stream(fp)
 
-    return sheets
 
+def _parse_legacy_stream(fp):
+    """使用 iterparse 流式构建 Topic 树。
 
-def _parse_legacy_topic(elem):
-    title_elem = elem.find('c:title', _NS)
-    topic = Topic(
-        title=title_elem.text if title_elem is not None and title_elem.text else '',
-        topic_id=elem.get('id'),
-    )
+    每个工作表处理完即清理其子树，峰值内存只与当前工作表大小相关。
+    """
+    sheets = []
+    open_elems = []     # 当前未闭合的元素栈
+    pending = []        # 每个未闭合 topic 已解析出的子节点
+    root_topic = None
+
+    for event, elem in _iterparse(fp):
+        tag = elem.tag
+
+        if event == 'start':
+            open_elems.append(elem)
+            if tag == _TAG_TOPIC:
+                pending.append([])
+            elif tag == _TAG_SHEET and len(open_elems) == 2:
+                root_topic = None
+            continue
 
-    # --- 备注 ---
-    notes_elem = elem.find('c:notes', _NS)
-    if notes_elem is not None:
-        plain_elem = notes_elem.find('c:plain', _NS)
-        if plain_elem is not None and plain_elem.text:
-            topic.notes = plain_elem.text
+        open_elems.pop()
+        parent = open_elems[-1] if open_elems else None
 
-    # --- 标签 ---
-    labels_elem = elem.find('c:labels', _NS)
-    if labels_elem is not None:
-        for lbl in labels_elem.findall('c:label', _NS):
-            if lbl.text:
-                topic.labels.append(lbl.text)
+        if tag == _TAG_TOPIC:
+            topic = _parse_legacy_topic(elem, pending.pop())
+            if parent is None:
+                continue
+            if parent.tag == _TAG_SHEET:
+                # 只有顶层工作表的直接子 topic 才是中心主题
+                if len(open_elems) == 2 and root_topic is None:
+                    root_topic = topic
+            elif (parent.tag == _TAG_TOPICS and parent.get('type') == 'attached'
+                    and len(open_elems) > 2
+                    and open_elems[-2].tag == _TAG_CHILDREN
+                    and open_elems[-3].tag == _TAG_TOPIC):
+                pending[-1].append(topic)
+
+        elif tag == _TAG_SHEET and len(open_elems) == 1:
+            title = None
+            for c in elem:
+                if c.tag == _TAG_TITLE:
+                    title = c.text
+                    break
+            sheet = Sheet(title=title or 'Sheet 1', sheet_id=elem.get('id'))
+            sheet.root_topic = root_topic
+            sheets.append(sheet)
+            elem.clear()
+
+    return sheets
+
+
+def _parse_legacy_topic(elem, children):
+    """由已闭合的 topic 元素构建节点；子节点已在流式解析中构建完毕。"""
+    topic = Topic(topic_id=elem.get('id'))
+    topic.children = children
 
     # --- 超链接 ---
-    href = elem.get(_XLINK, '')
+    href = elem.get(_XLINK_HREF, '')
     if href:
         topic.link = href
 
-    # --- 标记 ---
-    mrefs = elem.find('c:marker-refs', _NS)
-    if mrefs is not None:
-        for mref in mrefs.findall('c:marker-ref', _NS):
-            mid = mref.get('marker-id', '')
-            if mid:
-                topic.markers.append(mid)
+    # 单次遍历直接子元素，按标签分派；同名字段只取第一个
+    seen = set()
+    for c in elem:
+        t = c.tag
+        if t in seen:
+            continue
+        seen.add(t)
+
+        if t == _TAG_TITLE:
+            if c.text:
+                topic.title = c.text
+
+        # --- 备注 ---
+        elif t == _TAG_NOTES:
+            for plain in c:
+                if plain.tag == _TAG_PLAIN:
+                    if plain.text:
+                        topic.notes = plain.text
+                    break
 
-    # --- 子节点 ---
-    children_elem = elem.find('c:children', _NS)
-    if children_elem is not None:
-        for topics_elem in children_elem.findall('c:topics', _NS):
-            if topics_elem.get('type') == 'attached':
-                for child_elem in topics_elem.findall('c:topic', _NS):
-                    topic.children.append(_parse_legacy_topic(child_elem))
+        # --- 标签 ---
+        elif t == _TAG_LABELS:
+            topic.labels = [
+                lbl.text for lbl in c if lbl.tag == _TAG_LABEL and lbl.text
+            ]
+
+        # --- 标记 ---
+        elif t == _TAG_MARKER_REFS:
+            topic.markers = [
+                mref.get('marker-id')
+                for mref in c
+                if mref.tag == _TAG_MARKER_REF and mref.get('marker-id')
+            ]
 
     return topic
 
@@ -233,8 +370,7 @@ def sheets_to_markdown(sheets):
 
             parts.append('')  # 空行
 
-            for child in sheet.root_topic.children:
-                parts.append(_topic_to_md(child, depth=0))
+            _topics_to_md(sheet.root_topic.children, parts)
 
     return '\n'.join(parts)
 
@@ -254,45 +390,68 @@ def _format_meta_block(topic):
     return '\n'.join(lines)
 
 
-def _topic_to_md(topic, depth=0):
-    """递归地将节点转换为 Markdown 缩进列表项。"""
-    indent = '  ' * depth
-    lines = []
-
-    # 节点标题 + 行内元数据
-    inline = []
-    if topic.labels:
-        inline.append('{labels: ' + ', '.join(topic.labels) + '}')
-    if topic.link:
-        inline.append('{link: ' + topic.link + '}')
-    if topic.markers:
-        inline.append('{markers: ' + ', '.join(topic.markers) + '}')
-
-    title_line = f'{indent}- {topic.title}'
-    if inline:
-        title_line += '  ' + '  '.join(inline)
-    lines.append(title_line)
-
-    # 备注 → blockquote
-    if topic.notes:
-        for nl in topic.notes.splitlines():
-            lines.append(f'{indent}  > {nl}')
-
-    # 递归子节点
-    for child in topic.children:
-        lines.append(_topic_to_md(child, depth + 1))
-
-    return '\n'.join(lines)
+def _topics_to_md(topics, parts):
+    """将节点列表转换为 Markdown 缩进列表行，追加到 parts。
+
+    使用显式栈做先序遍历，所有行只在最外层 join 一次。
+    各层级的缩进前缀按需生成并缓存，避免每个节点重复拼接。
+    """
+    prefixes = []   # depth -> (列表项前缀, 备注前缀)
+    stack = [(t, 0) for t in reversed(topics)]
+    while stack:
+        topic, depth = stack.pop()
+        if depth == len(prefixes):
+            indent = '  ' * depth
+            prefixes.append((indent + '- ', indent + '  > '))
+        item_prefix, note_prefix = prefixes[depth]
+
+        # 节点标题 + 行内元数据
+        inline = []
+        if topic.labels:
+            inline.append('{labels: ' + ', '.join(topic.labels) + '}')
+        if topic.link:
+            inline.append('{link: ' + topic.link + '}')
+        if topic.markers:
+            inline.append('{markers: ' + ', '.join(topic.markers) + '}')
+
+        title_line = item_prefix + topic.title
+        if inline:
+            title_line += '  ' + '  '.join(inline)
+        parts.append(title_line)
+
+        # 备注 → blockquote
+        if topic.notes:
+            for nl in topic.notes.splitlines():
+                parts.append(note_prefix + nl)
+
+        # 子节点逆序入栈，保证按原顺序输出
+        for child in reversed(topic.children):
+            stack.append((child, depth + 1))
 
 
 # ============================================================
 # Markdown → 数据模型
 # ============================================================
 
+_RE_SHEET_SEP = re.compile(r'\n---\n')
+_RE_LIST_ITEM = re.compile(r'^(\s*)- (.+)$')
+_RE_QUOTE_PREFIX = re.compile(r'^>\s*')
+_META_RES = {
+    'labels': re.compile(r'\{labels:\s*([^}]+)\}'),
+    'link': re.compile(r'\{link:\s*([^}]+)\}'),
+    'markers': re.compile(r'\{markers:\s*([^}]+)\}'),
+}
+
+
 def markdown_to_sheets(md_text):
     """将 Markdown 文本解析回工作表列表。"""
+    # 常见的单工作表情况无需正则分割
+    if '\n---\n' not in md_text:
+        sheet = _parse_sheet_block(md_text.strip())
+        return [sheet] if sheet else []
+
     # 按 '---' 分割多个工作表
-    blocks = re.split(r'\n---\n', md_text)
+    blocks = _RE_SHEET_SEP.split(md_text)
     sheets = []
     for block in blocks:
         sheet = _parse_sheet_block(block.strip())
@@ -351,14 +510,19 @@ def _parse_sheet_block(block):
     return sheet
 
 
-def _parse_md_items(lines):
-    """将缩进列表行解析为 Topic 树。"""
+def _parse_md_items(lines, start=0, end=None):
+    """将 lines[start:end] 中的缩进列表行解析为 Topic 树。
+
+    子层级通过下标区间递归解析，不复制行列表。
+    """
+    if end is None:
+        end = len(lines)
     items = []
-    idx = 0
+    idx = start
 
-    while idx < len(lines):
+    while idx < end:
         line = lines[idx]
-        m = re.match(r'^(\s*)- (.+)$', line)
+        m = _RE_LIST_ITEM.match(line)
         if not m:
             idx += 1
             continue
@@ -367,48 +531,52 @@ def _parse_md_items(lines):
         topic = _parse_title_meta(m.group(2))
 
         idx += 1
-        child_lines = []
+        child_start = None
         note_lines = []
+        note_indent = cur_indent + 2
+        child_prefix = ' ' * note_indent
 
-        while idx < len(lines):
+        while idx < end:
             nxt = lines[idx]
-            stripped = nxt.strip()
+            body = nxt.lstrip()
 
-            if not stripped:
+            if not body:
                 idx += 1
                 continue
 
+            # 缩进宽度（与正则 ^\s* 的匹配长度一致）
+            nxt_indent = len(nxt) - len(body)
+
             # 是否是列表项？
-            nm = re.match(r'^(\s*)- ', nxt)
-            if nm:
-                nxt_indent = len(nm.group(1))
+            if body.startswith('- '):
                 if nxt_indent > cur_indent:
-                    child_lines.append(nxt)
+                    if child_start is None:
+                        child_start = idx
                     idx += 1
                     continue
                 else:
                     break
 
             # 是否是备注行（blockquote）？
-            bm = re.match(r'^(\s*)> (.*)$', nxt)
-            if bm:
-                bm_indent = len(bm.group(1))
+            if body.startswith('> '):
                 # 当前节点的备注：缩进恰好为 cur_indent+2，且尚未出现子节点
-                if not child_lines and bm_indent == cur_indent + 2:
-                    note_lines.append(bm.group(2))
+                if child_start is None and nxt_indent == note_indent:
+                    note_lines.append(body[2:])
                     idx += 1
                     continue
                 # 属于子节点的备注或内容
-                elif bm_indent > cur_indent:
-                    child_lines.append(nxt)
+                elif nxt_indent > cur_indent:
+                    if child_start is None:
+                        child_start = idx
                     idx += 1
                     continue
                 else:
                     break
 
             # 可能是子层级的续行
-            if nxt.startswith(' ' * (cur_indent + 2)):
-                child_lines.append(nxt)
+            if nxt.startswith(child_prefix):
+                if child_start is None:
+                    child_start = idx
                 idx += 1
                 continue
 
@@ -416,8 +584,8 @@ def _parse_md_items(lines):
 
         if note_lines:
             topic.notes = '\n'.join(note_lines)
-        if child_lines:
-            topic.children = _parse_md_items(child_lines)
+        if child_start is not None:
+            topic.children = _parse_md_items(lines, child_start, idx)
 
         items.append(topic)
 
@@ -429,15 +597,14 @@ def _parse_title_meta(raw):
     topic = Topic()
     remaining = raw
 
-    for key, attr in [('labels', 'labels'), ('link', 'link'), ('markers', 'markers')]:
-        pattern = r'\{' + key + r':\s*([^}]+)\}'
-        match = re.search(pattern, remaining)
+    for key, pattern in _META_RES.items():
+        match = pattern.search(remaining)
         if match:
             val = match.group(1).strip()
             if key in ('labels', 'markers'):
-                setattr(topic, attr, [v.strip() for v in val.split(',') if v.strip()])
+                setattr(topic, key, [v.strip() for v in val.split(',') if v.strip()])
             else:
-                setattr(topic, attr, val)
+                setattr(topic, key, val)
             remaining = remaining[:match.start()] + remaining[match.end():]
 
     topic.title = remaining.strip()
@@ -448,7 +615,7 @@ def _apply_block_meta(topic, meta_lines):
     """从 blockquote 行中提取元数据并应用到节点。"""
     note_parts = []
     for line in meta_lines:
-        text = re.sub(r'^>\s*', '', line)
+        text = _RE_QUOTE_PREFIX.sub('', line)
         if text.startswith('Labels:'):
             topic.labels = [v.strip() for v in text[7:].split(',') if v.strip()]
         elif text.startswith('Link:'):
@@ -465,6 +632,24 @@ def _apply_block_meta(topic, meta_lines):
 # 创建 XMind — Zen 格式
 # ============================================================
 
+# XML/JSON 文本在低压缩级别下体积损失很小，但压缩耗时显著降低
+_ZIP_COMPRESSLEVEL = 1
+
+
+def _open_zip(output_path):
+    return zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED,
+                           compresslevel=_ZIP_COMPRESSLEVEL)
+
+
+def _zip_entry(name):
+    """构造以当前时间为时间戳的 DEFLATE 压缩 ZIP 条目，供流式写入使用。"""
+    info = zipfile.ZipInfo(name, time.localtime()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    # 显式传入 ZipInfo 时 zipfile 不会继承归档的压缩级别
+    info._compresslevel = _ZIP_COMPRESSLEVEL
+    return info
+
+
 def create_zen(sheets, output_path):
     """以 Zen 格式创建 .xmind 文件。"""
     content = []
@@ -485,9 +670,9 @@ def create_zen(sheets, output_path):
         }
     }
 
-    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-        zf.writestr('content.json', json.dumps(content, ensure_ascii=False, indent=2))
-        zf.writestr('metadata.json', json.dumps(metadata, ensure_ascii=False, indent=2))
+    with _open_zip(output_path) as zf:
+        zf.writestr('content.json', _json_dumps(content))
+        zf.writestr('metadata.json', _json_dumps(metadata))
 
     return output_path
 
@@ -517,35 +702,20 @@ def _topic_to_zen_dict(topic):
 # 创建 XMind — Legacy 格式 (XMind 8)
 # ============================================================
 
-_CONTENT_NS = 'urn:xmind:xmap:xmlns:content:2.0'
-_XLINK_NS = 'http://www.w3.org/1999/xlink'
+# 属性值需额外转义引号与空白控制符，与 ElementTree 的输出保持一致
+_XML_ATTR_ENTITIES = {'"': '&quot;', '\n': '&#10;', '\r': '&#13;', '\t': '&#09;'}
 
 
-def _ctag(local):
-    """为 Legacy XML 元素添加内容命名空间前缀。"""
-    return f'{{{_CONTENT_NS}}}{local}'
+def _xml_attr(value):
+    return _xml_escape(value, _XML_ATTR_ENTITIES)
 
 
 def create_legacy(sheets, output_path):
-    """以 Legacy (XMind 8) 格式创建 .xmind 文件。"""
-    ET.register_namespace('', _CONTENT_NS)
-    ET.register_namespace('xlink', _XLINK_NS)
-
-    root = ET.Element(_ctag('xmap-content'))
-    root.set('version', '2.0')
-
-    for sheet in sheets:
-        sheet_elem = ET.SubElement(root, _ctag('sheet'))
-        sheet_elem.set('id', sheet.id)
-        sheet_elem.set('timestamp', str(int(time.time() * 1000)))
-
-        if sheet.root_topic:
-            _topic_to_legacy_xml(sheet_elem, sheet.root_topic)
-
-        title_elem = ET.SubElement(sheet_elem, _ctag('title'))
-        title_elem.text = sheet.title
+    """以 Legacy (XMind 8) 格式创建 .xmind 文件。
 
-    tree = ET.ElementTree(root)
+    文档结构固定，直接将 XML 文本流式写入 ZIP 条目，不构建 Element 树。
+    """
+    ts = str(int(time.time() * 1000))
 
     manifest = (
         '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
@@ -556,49 +726,53 @@ def create_legacy(sheets, output_path):
         '</manifest>'
     )
 
-    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-        buf = io.BytesIO()
-        tree.write(buf, encoding='UTF-8', xml_declaration=True)
-        zf.writestr('content.xml', buf.getvalue())
+    with _open_zip(output_path) as zf:
+        fp = zf.open(_zip_entry('content.xml'), 'w', force_zip64=True)
+        with io.TextIOWrapper(fp, encoding='utf-8', newline='') as out:
+            out.write('<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n')
+            out.write(f'<xmap-content xmlns="{_CONTENT_NS}" '
+                      f'xmlns:xlink="{_XLINK_NS}" version="2.0">')
+            for sheet in sheets:
+                out.write(f'<sheet id="{_xml_attr(sheet.id)}" timestamp="{ts}">')
+                if sheet.root_topic:
+                    _write_topic_xml(out, sheet.root_topic, ts)
+                out.write(f'<title>{_xml_escape(sheet.title)}</title></sheet>')
+            out.write('</xmap-content>')
         zf.writestr('META-INF/manifest.xml', manifest)
 
     return output_path
 
 
-def _topic_to_legacy_xml(parent, topic):
-    elem = ET.SubElement(parent, _ctag('topic'))
-    elem.set('id', topic.id)
-    elem.set('timestamp', str(int(time.time() * 1000)))
-
-    t = ET.SubElement(elem, _ctag('title'))
-    t.text = topic.title
+def _write_topic_xml(out, topic, ts):
+    """递归写出单个 topic 元素及其子树。"""
+    write = out.write
+    write(f'<topic id="{_xml_attr(topic.id)}" timestamp="{ts}"')
+    if topic.link:
+        write(f' xlink:href="{_xml_attr(topic.link)}"')
+    write(f'><title>{_xml_escape(topic.title)}</title>')
 
     if topic.notes:
-        notes_e = ET.SubElement(elem, _ctag('notes'))
-        plain_e = ET.SubElement(notes_e, _ctag('plain'))
-        plain_e.text = topic.notes
+        write(f'<notes><plain>{_xml_escape(topic.notes)}</plain></notes>')
 
     if topic.labels:
-        labels_e = ET.SubElement(elem, _ctag('labels'))
+        write('<labels>')
         for lbl in topic.labels:
-            le = ET.SubElement(labels_e, _ctag('label'))
-            le.text = lbl
-
-    if topic.link:
-        elem.set(f'{{{_XLINK_NS}}}href', topic.link)
+            write(f'<label>{_xml_escape(lbl)}</label>')
+        write('</labels>')
 
     if topic.markers:
-        mrefs = ET.SubElement(elem, _ctag('marker-refs'))
+        write('<marker-refs>')
         for mid in topic.markers:
-            mr = ET.SubElement(mrefs, _ctag('marker-ref'))
-            mr.set('marker-id', mid)
+            write(f'<marker-ref marker-id="{_xml_attr(mid)}"/>')
+        write('</marker-refs>')
 
     if topic.children:
-        children_e = ET.SubElement(elem, _ctag('children'))
-        topics_e = ET.SubElement(children_e, _ctag('topics'))
-        topics_e.set('type', 'attached')
+        write('<children><topics type="attached">')
         for child in topic.children:
-            _topic_to_legacy_xml(topics_e, child)
+            _write_topic_xml(out, child, ts)
+        write('</topics></children>')
+
+    write('</topic>')
 
 
 # ============================================================
@@ -609,8 +783,7 @@ def update_xmind(xmind_path, md_path):
     """从修改后的 Markdown 更新已有 XMind 文件（保留原格式）。"""
     fmt = detect_format(xmind_path)
 
-    with open(md_path, 'r', encoding='utf-8') as f:
-        md_text = f.read()
+    md_text = read_markdown(md_path)
 
     sheets = markdown_to_sheets(md_text)
 
@@ -626,6 +799,26 @@ def update_xmind(xmind_path, md_path):
 # 会话记忆文件管理
 # ============================================================
 
+# Markdown 文件整体读写，使用较大的缓冲区并跳过文本层
+_IO_BUFFER_SIZE = 1 << 20
+
+
+def read_markdown(path):
+    """以 UTF-8 读取 Markdown 文件，换行统一为 '\n'（与文本模式读取一致）。"""
+    with open(path, 'rb', buffering=_IO_BUFFER_SIZE) as f:
+        text = f.read().decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def write_markdown(path, text):
+    """以 UTF-8 一次性写出 Markdown 文件。"""
+    data = text.encode('utf-8')
+    with open(path, 'wb', buffering=_IO_BUFFER_SIZE) as f:
+        f.write(data)
+
+
 def get_memory_dir(session_id):
     """获取会话记忆目录: /tmp/skills-xmind-parsed/<session-id>/"""
     d = os.path.join(tempfile.gettempdir(), 'skills-xmind-parsed', session_id)
@@ -653,14 +846,12 @@ def cmd_parse(session_id, args):
         print(f'错误：文件不存在: {xmind_path}', file=sys.stderr)
         return 1
 
-    fmt = detect_format(xmind_path)
-    sheets = parse_zen(xmind_path) if fmt == 'zen' else parse_legacy(xmind_path)
+    _, sheets = parse_any(xmind_path)
     md = sheets_to_markdown(sheets)
 
     # 保存到会话记忆
     mem = get_memory_path(session_id, xmind_path)
-    with open(mem, 'w', encoding='utf-8') as f:
-        f.write(md)
+    write_markdown(mem, md)
 
     print(md)
     print(f'\n<!-- memory_file: {mem} -->')
@@ -685,8 +876,7 @@ def cmd_create(session_id, args):
         print(f'错误：Markdown 文件不存在: {md_path}', file=sys.stderr)
         return 1
 
-    with open(md_path, 'r', encoding='utf-8') as f:
-        md_text = f.read()
+    md_text = read_markdown(md_path)
 
     sheets = markdown_to_sheets(md_text)
     if not sheets:
@@ -700,8 +890,7 @@ def cmd_create(session_id, args):
 
     # 更新会话记忆
     mem = get_memory_path(session_id, output_path)
-    with open(mem, 'w', encoding='utf-8') as f:
-        f.write(md_text)
+    write_markdown(mem, md_text)
 
     print(f'已创建: {output_path}')
     print(f'格式: {fmt}')
@@ -728,10 +917,8 @@ def cmd_update(session_id, args):
 
     # 更新会话记忆
     mem = get_memory_path(session_id, xmind_path)
-    with open(md_path, 'r', encoding='utf-8') as f:
-        md_text = f.read()
-    with open(mem, 'w', encoding='utf-8') as f:
-        f.write(md_text)
+    md_text = read_markdown(md_path)
+    write_markdown(mem, md_text)
 
     print(f'已更新: {xmind_path}')
     print(f'记忆文件: {mem}')
@@ -747,8 +934,7 @@ def cmd_memory(session_id, args):
     mem = get_memory_path(session_id, xmind_path)
 
     if os.path.exists(mem):
-        with open(mem, 'r', encoding='utf-8') as f:
-            print(f.read())
+        print(read_markdown(mem))
     else:
         print(f'未找到记忆文件: {mem}', file=sys.stderr)
         print(f'请先使用 parse 命令解析对应的 xmind 文件。', file=sys.stderr)